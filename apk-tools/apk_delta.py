@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Binary delta tool for Dragon Land APKs
+Encodes a modified APK as copies from the original plus literal bytes
+
+Usage:
+    python apk_delta.py create <original.apk> <modified.apk> <out.delta>
+    python apk_delta.py apply <original.apk> <in.delta> <out.apk>
+"""
+
+import os
+import sys
+import zlib
+import struct
+import hashlib
+from pathlib import Path
+
+MAGIC = b"DLDELTA1"
+HEADER = struct.Struct(">8sQ32sQ32sI")
+COPY = struct.Struct(">QQ")
+ADD = struct.Struct(">I")
+
+OP_COPY = b"C"
+OP_ADD = b"A"
+OP_END = b"E"
+
+BLOCK_SIZE = 4096
+MAX_LITERAL = 64 * 1024
+READ_SIZE = 1024 * 1024
+ADLER_MOD = 65521
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _read_exact(f, size):
+    """Read exactly size bytes from a delta, failing on truncation"""
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError(f"{f.name}: truncated delta")
+    return data
+
+
+def _strong(block):
+    return hashlib.blake2b(block, digest_size=16).digest()
+
+
+def _index_source(path, block_size):
+    """Map Adler-32 of every aligned source block to (strong hash, offset)"""
+    index = {}
+    with open(path, "rb") as f:
+        offset = 0
+        while True:
+            block = f.read(block_size)
+            if len(block) < block_size:
+                break
+            index.setdefault(zlib.adler32(block), []).append((_strong(block), offset))
+            offset += block_size
+    return index
+
+
+class _DeltaWriter:
+    """Buffers literals and merges adjacent copies before writing ops"""
+
+    def __init__(self, out):
+        self.out = out
+        self.literal = bytearray()
+        self.copy_start = None
+        self.copy_length = 0
+        self.stats = {"copied": 0, "literal": 0}
+
+    def add(self, data):
+        self._flush_copy()
+        self.literal += data
+        self.stats["literal"] += len(data)
+        while len(self.literal) >= MAX_LITERAL:
+            self._write_literal(self.literal[:MAX_LITERAL])
+            del self.literal[:MAX_LITERAL]
+
+    def copy(self, offset, length):
+        self._flush_literal()
+        if self.copy_start is not None and self.copy_start + self.copy_length == offset:
+            self.copy_length += length
+        else:
+            self._flush_copy()
+            self.copy_start, self.copy_length = offset, length
+        self.stats["copied"] += length
+
+    def copy_end(self):
+        """Source offset right after the pending copy, or None"""
+        if self.copy_start is None:
+            return None
+        return self.copy_start + self.copy_length
+
+    def _write_literal(self, data):
+        self.out.write(OP_ADD + ADD.pack(len(data)))
+        self.out.write(data)
+
+    def _flush_literal(self):
+        if self.literal:
+            self._write_literal(self.literal)
+            self.literal = bytearray()
+
+    def _flush_copy(self):
+        if self.copy_start is not None:
+            self.out.write(OP_COPY + COPY.pack(self.copy_start, self.copy_length))
+            self.copy_start, self.copy_length = None, 0
+
+    def close(self):
+        self._flush_literal()
+        self._flush_copy()
+        self.out.write(OP_END)
+
+
+def create_delta(source_path, target_path, delta_path, block_size=BLOCK_SIZE):
+    """Write a delta that rebuilds target_path from source_path
+
+    The source is indexed by aligned blocks (weak Adler-32 plus BLAKE2b).
+    The target is streamed through a bounded buffer: runs that continue the
+    previous copy are matched directly against the source, and only
+    mismatched regions fall back to a rolling hash. Memory is bounded by the
+    block index and the read buffer, not by either file.
+    """
+    index = _index_source(source_path, block_size)
+    target_size = os.path.getsize(target_path)
+    target_hash = hashlib.sha256()
+
+    with open(source_path, "rb") as src, open(target_path, "rb") as tgt, open(delta_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, 0, b"\0" * 32, 0, b"\0" * 32, block_size))
+        writer = _DeltaWriter(out)
+
+        buf = bytearray()
+        pos = 0
+        eof = False
+        weak = None  # (a, b) rolling Adler-32 state for buf[pos:pos + block_size]
+
+        while True:
+            if not eof and len(buf) - pos < 2 * block_size:
+                del buf[:pos]
+                pos = 0
+                chunk = tgt.read(READ_SIZE)
+                if chunk:
+                    target_hash.update(chunk)
+                    buf += chunk
+                else:
+                    eof = True
+                continue
+
+            remaining = len(buf) - pos
+            if remaining == 0:
+                break
+            window = bytes(buf[pos:pos + block_size])
+
+            # Fast path: the target keeps following the source
+            next_src = writer.copy_end()
+            if next_src is not None:
+                src.seek(next_src)
+                if src.read(len(window)) == window:
+                    writer.copy(next_src, len(window))
+                    pos += len(window)
+                    weak = None
+                    continue
+
+            if len(window) < block_size:
+                writer.add(window)
+                pos += len(window)
+                continue
+
+            if weak is None:
+                value = zlib.adler32(window)
+                weak = (value & 0xFFFF, value >> 16)
+            a, b = weak
+            candidates = index.get((b << 16) | a)
+            if candidates:
+                strong = _strong(window)
+                match = next((offset for digest, offset in candidates if digest == strong), None)
+                if match is not None:
+                    writer.copy(match, block_size)
+                    pos += block_size
+                    weak = None
+                    continue
+
+            # No match: roll the window forward until the weak hash hits again
+            start = pos
+            limit = len(buf) - block_size
+            while pos < limit:
+                out_byte = buf[pos]
+                in_byte = buf[pos + block_size]
+                a = (a - out_byte + in_byte) % ADLER_MOD
+                b = (b - block_size * out_byte + a - 1) % ADLER_MOD
+                pos += 1
+                if ((b << 16) | a) in index:
+                    break
+
+            if pos == start:
+                writer.add(buf[pos:pos + 1])
+                pos += 1
+                weak = None
+            else:
+                writer.add(buf[start:pos])
+                weak = (a, b)
+
+        writer.close()
+        delta_size = out.tell()
+        out.seek(0)
+        out.write(HEADER.pack(
+            MAGIC, os.path.getsize(source_path), _sha256_file(source_path),
+            target_size, target_hash.digest(), block_size
+        ))
+
+    stats = dict(writer.stats)
+    stats["delta_size"] = delta_size
+    stats["target_size"] = target_size
+    return stats
+
+
+def apply_delta(source_path, delta_path, output_path):
+    """Rebuild the target from source_path and a delta, verifying SHA-256"""
+    with open(delta_path, "rb") as delta:
+        magic, source_size, source_sha, target_size, target_sha, _ = HEADER.unpack(_read_exact(delta, HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{delta_path}: not a Dragon Land delta")
+        if os.path.getsize(source_path) != source_size or _sha256_file(source_path) != source_sha:
+            raise ValueError(f"{source_path}: does not match the delta's source APK")
+
+        output_path = Path(output_path)
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        digest = hashlib.sha256()
+        try:
+            with open(source_path, "rb") as src, open(tmp_path, "wb") as out:
+                while True:
+                    op = _read_exact(delta, 1)
+                    if op == OP_END:
+                        break
+                    if op == OP_COPY:
+                        offset, length = COPY.unpack(_read_exact(delta, COPY.size))
+                        src.seek(offset)
+                        while length:
+                            chunk = src.read(min(READ_SIZE, length))
+                            if not chunk:
+                                raise ValueError("copy runs past the end of the source APK")
+                            digest.update(chunk)
+                            out.write(chunk)
+                            length -= len(chunk)
+                    elif op == OP_ADD:
+                        (length,) = ADD.unpack(_read_exact(delta, ADD.size))
+                        chunk = _read_exact(delta, length)
+                        digest.update(chunk)
+                        out.write(chunk)
+                    else:
+                        raise ValueError(f"{delta_path}: corrupt delta (op {op!r})")
+                written = out.tell()
+            if written != target_size or digest.digest() != target_sha:
+                raise ValueError("checksum mismatch: rebuilt APK does not match the delta target")
+        except BaseException:
+            # Never leave a partial APK behind
+            if tmp_path.exists():
+                os.remove(tmp_path)
+            raise
+
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def main():
+    if len(sys.argv) != 5 or sys.argv[1] not in ("create", "apply"):
+        print(__doc__.strip())
+        sys.exit(1)
+
+    command, first, second, third = sys.argv[1:]
+    try:
+        if command == "create":
+            stats = create_delta(first, second, third)
+            print(f"✓ Delta written: {third}")
+            print(f"   {stats['delta_size'] / 1024:.1f} KB for a {stats['target_size'] / (1024*1024):.2f} MB APK "
+                  f"({stats['copied']} bytes copied, {stats['literal']} literal)")
+        else:
+            output = apply_delta(first, second, third)
+            print(f"✓ APK rebuilt and verified: {output}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Unity serialized asset scanner for Dragon Land
+Finds and patches PhotonServerSettings values inside binary .assets files
+"""
+
+import os
+import re
+import mmap
+import time
+import struct
+import fnmatch
+from collections import namedtuple
+from pathlib import Path
+
+CANDIDATE_PATTERNS = [
+    "resources.assets",
+    "sharedassets*.assets",
+    "globalgamemanagers*",
+    "level*",
+    "data.unity3d",
+    "*.assets",
+]
+
+# ServerSettings.HostingOption values (PUN Classic)
+HOSTING_OPTIONS = range(0, 6)
+SELF_HOSTED = 2
+
+CHUNK_SIZE = 1024 * 1024
+
+AssetHit = namedtuple("AssetHit", "path offset label length")
+FieldEdit = namedtuple("FieldEdit", "offset kind old_length value")
+ObjectInfo = namedtuple("ObjectInfo", "start size start_pos size_pos")
+
+
+def _align4(n):
+    return (n + 3) & ~3
+
+
+def find_candidate_assets(root):
+    """List Unity data files under root that may hold serialized settings"""
+    candidates = []
+    for dirpath, dirs, files in os.walk(root):
+        for name in files:
+            if any(fnmatch.fnmatch(name, pattern) for pattern in CANDIDATE_PATTERNS):
+                path = Path(dirpath) / name
+                if path.stat().st_size:
+                    candidates.append(path)
+    return sorted(candidates)
+
+
+class SerializedFile:
+    """Header and object table of a Unity SerializedFile (format 14-22+)
+
+    Only the fields needed to move object data around are kept: the file
+    size field, the data offset and each object's byteStart/byteSize.
+    Older formats (Unity 4 and earlier) are rejected.
+    """
+
+    def __init__(self, buf):
+        metadata_size, file_size, version, data_offset = struct.unpack_from(">4I", buf, 0)
+        if not 14 <= version <= 50:
+            raise ValueError(f"unsupported serialized file version {version}")
+        self.version = version
+        self.endian = ">" if buf[16] else "<"
+
+        if version >= 22:
+            metadata_size, file_size, data_offset = struct.unpack_from(">IQQ", buf, 20)
+            self.file_size_pos, self.file_size_fmt = 24, ">Q"
+            pos = 48
+        else:
+            self.file_size_pos, self.file_size_fmt = 4, ">I"
+            pos = 20
+        if file_size != len(buf) or not pos <= data_offset <= len(buf):
+            raise ValueError("not a serialized file")
+        self.file_size = file_size
+        self.data_offset = data_offset
+        self.objects = self._read_objects(buf, pos)
+
+    def _read_objects(self, buf, pos):
+        e = self.endian
+        v = self.version
+
+        pos = buf.find(b"\0", pos) + 1  # Unity version string
+        if not pos:
+            raise ValueError("unterminated Unity version string")
+        pos += 4  # target platform
+        type_tree = buf[pos]
+        pos += 1
+
+        (type_count,) = struct.unpack_from(e + "i", buf, pos)
+        pos += 4
+        for _ in range(type_count):
+            (class_id,) = struct.unpack_from(e + "i", buf, pos)
+            pos += 4
+            if v >= 16:
+                pos += 1  # stripped flag
+            if v >= 17:
+                pos += 2  # script type index
+            if (v < 16 and class_id < 0) or (v >= 16 and class_id == 114):
+                pos += 16  # script ID
+            pos += 16  # old type hash
+            if type_tree:
+                node_count, string_size = struct.unpack_from(e + "ii", buf, pos)
+                pos += 8 + node_count * (32 if v >= 19 else 24) + string_size
+                if v >= 21:
+                    # Type dependencies are only written with the type tree
+                    (deps,) = struct.unpack_from(e + "i", buf, pos)
+                    pos += 4 + deps * 4
+
+        (object_count,) = struct.unpack_from(e + "i", buf, pos)
+        pos += 4
+        objects = []
+        for _ in range(object_count):
+            pos = _align4(pos)
+            pos += 8  # path ID
+            start_pos = pos
+            if v >= 22:
+                (start,) = struct.unpack_from(e + "Q", buf, pos)
+                pos += 8
+            else:
+                (start,) = struct.unpack_from(e + "I", buf, pos)
+                pos += 4
+            size_pos = pos
+            (size,) = struct.unpack_from(e + "I", buf, pos)
+            pos += 4 + 4  # byte size, type ID
+            if v < 16:
+                pos += 2  # class ID
+            if v < 17:
+                pos += 2  # script type index
+            if v in (15, 16):
+                pos += 1  # stripped flag
+            if pos > self.data_offset:
+                raise ValueError("object table overruns data section")
+            objects.append(ObjectInfo(start, size, start_pos, size_pos))
+        return objects
+
+    def object_at(self, offset):
+        """Return the object whose data contains the absolute file offset"""
+        for obj in self.objects:
+            start = self.data_offset + obj.start
+            if start <= offset < start + obj.size:
+                return obj
+        return None
+
+
+class AssetScanner:
+    """Memory-mapped multi-pattern search for length-prefixed Unity strings
+
+    fields maps a label (e.g. "AppID") to the current string value. Unity
+    serializes strings as a little-endian int32 length followed by the bytes,
+    so each value is searched together with its length prefix. Compressed
+    bundles (LZ4 UnityFS) cannot be searched and simply produce no hits.
+    """
+
+    def __init__(self, fields):
+        self.needles = {}
+        for label, value in fields.items():
+            raw = value.encode("utf-8")
+            self.needles[struct.pack("<I", len(raw)) + raw] = (label, len(raw))
+        self.pattern = re.compile(b"|".join(re.escape(needle) for needle in self.needles))
+
+    def scan_file(self, path):
+        """Return every hit in a single file"""
+        hits = []
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for match in self.pattern.finditer(mm):
+                label, length = self.needles[match.group()]
+                hits.append(AssetHit(Path(path), match.start(), label, length))
+        return hits
+
+    def scan_tree(self, root):
+        """Scan all candidate assets under root, returning (hits, stats)"""
+        start = time.perf_counter()
+        hits = []
+        scanned = 0
+        candidates = find_candidate_assets(root)
+        for path in candidates:
+            scanned += path.stat().st_size
+            hits.extend(self.scan_file(path))
+        stats = {
+            "files": len(candidates),
+            "bytes": scanned,
+            "seconds": time.perf_counter() - start
+        }
+        return hits, stats
+
+
+def locate_server_fields(mm, appid_offset):
+    """Walk ServerSettings from its AppID string to HostType/ServerAddress/ServerPort
+
+    Returns a dict of field -> (offset, length) or None if the bytes after
+    the AppID don't look like PUN Classic ServerSettings.
+    """
+    try:
+        pos = appid_offset
+        for _ in range(3):  # AppID, VoiceAppID, ChatAppID
+            (length,) = struct.unpack_from("<I", mm, pos)
+            if length > 256:
+                return None
+            pos += 4 + _align4(length)
+
+        host_type_pos = pos
+        (host_type,) = struct.unpack_from("<i", mm, host_type_pos)
+        pos += 4 * 4  # HostType, PreferredRegion, EnabledRegions, Protocol
+
+        address_pos = pos
+        (address_length,) = struct.unpack_from("<I", mm, address_pos)
+        if address_length > 256:
+            return None
+        pos += 4 + _align4(address_length)
+
+        port_pos = pos
+        (port,) = struct.unpack_from("<i", mm, port_pos)
+    except struct.error:
+        return None
+
+    if host_type not in HOSTING_OPTIONS or not 0 < port < 65536:
+        return None
+    return {
+        "HostType": (host_type_pos, 4),
+        "ServerAddress": (address_pos, address_length),
+        "ServerPort": (port_pos, 4),
+    }
+
+
+def _owning_object(path, mm, edit):
+    """Parse the file header and return (header, object) holding a string edit"""
+    try:
+        header = SerializedFile(mm)
+    except (ValueError, struct.error) as e:
+        raise ValueError(f"{path}: cannot resize string ({e})")
+    obj = header.object_at(edit.offset)
+    if obj is None or edit.offset < header.data_offset:
+        raise ValueError(f"{path}: string at {edit.offset} is not inside an object")
+    return header, obj
+
+
+def _resize_string(path, edit):
+    """Rewrite a length-prefixed string whose padded size changes
+
+    Streams the file into a temporary copy with the string replaced, then
+    fixes the owning object's byteSize, the byteStart of every later object
+    and the header file size. Later objects move by a multiple of 8 so
+    their alignment is preserved; any extra bytes go after the owning object.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header, obj = _owning_object(path, mm, edit)
+        old_total = 4 + _align4(edit.old_length)
+        new_total = 4 + _align4(len(edit.value))
+        delta = new_total - old_total
+        shift = delta + (-delta) % 8
+        obj_end = header.data_offset + obj.start + obj.size
+
+        tmp_path = Path(str(path) + ".tmp")
+        with open(tmp_path, "wb") as out:
+            _copy(mm, out, 0, edit.offset)
+            out.write(struct.pack("<I", len(edit.value)))
+            out.write(edit.value)
+            out.write(b"\0" * (new_total - 4 - len(edit.value)))
+            _copy(mm, out, edit.offset + old_total, obj_end)
+            out.write(b"\0" * (shift - delta))
+            _copy(mm, out, obj_end, len(mm))
+
+            e = header.endian
+            start_fmt = e + ("Q" if header.version >= 22 else "I")
+            for other in header.objects:
+                if other.start > obj.start:
+                    out.seek(other.start_pos)
+                    out.write(struct.pack(start_fmt, other.start + shift))
+            out.seek(obj.size_pos)
+            out.write(struct.pack(e + "I", obj.size + delta))
+            out.seek(header.file_size_pos)
+            out.write(struct.pack(header.file_size_fmt, header.file_size + shift))
+
+    os.replace(tmp_path, path)
+
+
+def _copy(mm, out, start, end):
+    """Write mm[start:end] to out in bounded chunks"""
+    for pos in range(start, end, CHUNK_SIZE):
+        out.write(mm[pos:min(pos + CHUNK_SIZE, end)])
+
+
+def apply_edits(path, edits):
+    """Apply FieldEdits to one file
+
+    int32 edits and strings whose padded size is unchanged are written in
+    place through a writable mmap. Strings that grow or shrink are then
+    rewritten from the highest offset down, so earlier offsets stay valid.
+    Every resize is checked against the object table before anything is
+    written, so an unsupported file is left untouched.
+    """
+    resized = [edit for edit in edits
+               if edit.kind == "string" and _align4(len(edit.value)) != _align4(edit.old_length)]
+    if resized:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for edit in resized:
+                _owning_object(path, mm, edit)
+
+    with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+        for edit in edits:
+            if edit in resized:
+                continue
+            if edit.kind == "int32":
+                struct.pack_into("<i", mm, edit.offset, edit.value)
+            else:
+                padded = edit.value + b"\0" * (_align4(edit.old_length) - len(edit.value))
+                struct.pack_into("<I", mm, edit.offset, len(edit.value))
+                mm[edit.offset + 4:edit.offset + 4 + len(padded)] = padded
+        mm.flush()
+
+    for edit in sorted(resized, key=lambda edit: edit.offset, reverse=True):
+        _resize_string(path, edit)
+    return len(edits) - len(resized), len(resized)
+
+
+def plan_settings_edits(hit, new_appid=None, new_server=None, new_port=5055):
+    """Build the FieldEdits for one AppID hit"""
+    edits = []
+    if new_appid:
+        edits.append(FieldEdit(hit.offset, "string", hit.length, new_appid.encode("utf-8")))
+    if new_server:
+        with open(hit.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            fields = locate_server_fields(mm, hit.offset)
+        if not fields:
+            return None
+        edits.append(FieldEdit(fields["HostType"][0], "int32", 4, SELF_HOSTED))
+        edits.append(FieldEdit(fields["ServerPort"][0], "int32", 4, new_port))
+        address_pos, address_length = fields["ServerAddress"]
+        edits.append(FieldEdit(address_pos, "string", address_length, new_server.encode("utf-8")))
+    return edits
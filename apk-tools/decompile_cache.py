@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Decompiled APK cache for Dragon Land
+Keeps pristine decompiled trees keyed by APK hash and decompiler version
+"""
+
+import os
+import json
+import time
+import stat
+import shutil
+import hashlib
+from pathlib import Path
+
+HASH_CHUNK = 1024 * 1024
+
+
+def hash_file(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    """Hardlink src to dst, copying when links are not possible"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _copy_writable(src, dst):
+    """Copy src to dst and make the copy writable by its owner"""
+    shutil.copy2(src, dst)
+    os.chmod(dst, stat.S_IMODE(os.stat(dst).st_mode) | stat.S_IWUSR)
+
+
+def _tree_size(tree):
+    """Total size in bytes of all files under tree"""
+    total = 0
+    for root, dirs, files in os.walk(tree):
+        for file in files:
+            total += os.lstat(os.path.join(root, file)).st_size
+    return total
+
+
+class DecompileCache:
+    """Content-addressed store of decompiled APK trees with LRU eviction
+
+    Each entry lives in <root>/<key>/ with the pristine tree under tree/ and
+    a meta.json holding per-file hashes, size, mtime and last-use time.
+    Cached files are read-only and pipeline checkouts are hardlinked, so edits
+    to such a checkout must replace files rather than write into them. A
+    cached file whose size or mtime no longer matches meta.json invalidates
+    the whole entry.
+    """
+
+    def __init__(self, root, max_bytes=4 * 1024**3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def key_for(self, apk_path, tool_version):
+        """Cache key for an APK decompiled with a given tool version"""
+        digest = hashlib.sha256()
+        digest.update(hash_file(apk_path).encode())
+        digest.update(b"\0")
+        digest.update(tool_version.encode())
+        return digest.hexdigest()
+
+    def _meta_path(self, key):
+        return self.root / key / "meta.json"
+
+    def _read_meta(self, key):
+        try:
+            with open(self._meta_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, key, meta):
+        tmp = self._meta_path(key).with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(key))
+
+    def lookup(self, key):
+        """Return metadata for a cached tree and mark it used, or None
+
+        Entries whose files were modified in place are dropped and reported
+        as a miss.
+        """
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        if not self._verify(key, meta):
+            print(f"   ⚠ Cached tree {key[:12]} was modified, discarding it")
+            shutil.rmtree(self.root / key)
+            return None
+        meta["last_used"] = time.time()
+        self._write_meta(key, meta)
+        return meta
+
+    def _verify(self, key, meta):
+        """Check every cached file still has its recorded size and mtime"""
+        tree = self.root / key / "tree"
+        for rel, info in meta["files"].items():
+            try:
+                st = os.stat(tree / rel)
+            except OSError:
+                return False
+            if st.st_size != info["size"] or st.st_mtime_ns != info.get("mtime_ns"):
+                return False
+        return True
+
+    def staging_dir(self, key):
+        """Empty directory to decompile into before calling store()"""
+        staging = self.root / f"{key}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        return staging
+
+    def store(self, key, staging, decompile_seconds, tool_version):
+        """Move a freshly decompiled tree into the cache and index it"""
+        entry = self.root / key
+        if entry.exists():
+            shutil.rmtree(entry)
+        entry.mkdir()
+        os.replace(staging, entry / "tree")
+
+        files = {}
+        tree = entry / "tree"
+        for root, dirs, names in os.walk(tree):
+            for name in names:
+                path = Path(root) / name
+                # Read-only, so in-place writes through a hardlink fail
+                st = path.stat()
+                os.chmod(path, stat.S_IMODE(st.st_mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+                files[path.relative_to(tree).as_posix()] = {
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "sha256": hash_file(path)
+                }
+
+        meta = {
+            "tool": tool_version,
+            "created": time.time(),
+            "last_used": time.time(),
+            "decompile_seconds": decompile_seconds,
+            "size_bytes": sum(info["size"] for info in files.values()),
+            "files": files
+        }
+        self._write_meta(key, meta)
+        self.evict(keep=key)
+        return meta
+
+    def checkout(self, key, dest, editable=False):
+        """Materialize the cached tree at dest
+
+        Pipeline checkouts are hardlinked (read-only files). With
+        editable=True the files are copied and made writable, for trees
+        handed to the user.
+        """
+        dest = Path(dest)
+        if dest.exists():
+            shutil.rmtree(dest)
+        if editable:
+            shutil.copytree(self.root / key / "tree", dest, copy_function=_copy_writable)
+        else:
+            shutil.copytree(self.root / key / "tree", dest, copy_function=_link_or_copy)
+        return dest
+
+    def diff(self, key, tree):
+        """Compare a checkout against the cached hashes
+
+        Returns (changed, added, removed) lists of POSIX relative paths.
+        Files whose size and mtime match meta.json are skipped without
+        hashing; anything else is hashed.
+        """
+        tree = Path(tree)
+        files = self._read_meta(key)["files"]
+
+        changed, added, seen = [], [], set()
+        for root, dirs, names in os.walk(tree):
+            for name in names:
+                path = Path(root) / name
+                rel = path.relative_to(tree).as_posix()
+                seen.add(rel)
+                info = files.get(rel)
+                if info is None:
+                    added.append(rel)
+                    continue
+                st = path.stat()
+                if st.st_size == info["size"] and st.st_mtime_ns == info.get("mtime_ns"):
+                    continue
+                if st.st_size != info["size"] or hash_file(path) != info["sha256"]:
+                    changed.append(rel)
+
+        removed = sorted(set(files) - seen)
+        return sorted(changed), sorted(added), removed
+
+    def evict(self, keep=None):
+        """Drop least recently used trees until the cache fits max_bytes"""
+        entries = []
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name.endswith(".tmp"):
+                continue
+            meta = self._read_meta(entry.name)
+            if meta is None:
+                size = _tree_size(entry)
+                last_used = 0
+            else:
+                size = meta["size_bytes"]
+                last_used = meta["last_used"]
+            entries.append((last_used, entry.name, size))
+
+        total = sum(size for _, _, size in entries)
+        evicted = []
+        for last_used, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.root / key)
+            total -= size
+            evicted.append(key)
+        return evicted
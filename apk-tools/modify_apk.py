@@ -7,28 +7,92 @@ Modifies PhotonServerSettings to point to new server
 import os
 import sys
 import yaml
+import argparse
+import re
+import json
+import time
+import stat
 import shutil
+import zipfile
 import subprocess
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from zip_patch import read_central_directory, patch_zip
+from decompile_cache import DecompileCache
+from asset_scanner import AssetScanner, apply_edits, plan_settings_edits
+from apk_delta import create_delta
+
+SETTINGS_ASSET = "PhotonServerSettings.asset"
+VARIANT_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+ORIGINAL_APPID = "1eb3a592-f2d1-41c1-ac3a-cd6308fca5cb"
+APKTOOL_RAW_DIR = "assets/"
+SIGNATURE_FILE = re.compile(r"^META-INF/([^/]+\.(SF|RSA|DSA|EC)|MANIFEST\.MF)$", re.IGNORECASE)
 
 class APKModifier:
-    def __init__(self, apk_path, output_dir="/workspace/dragon-land-server/modified-apk"):
+    def __init__(self, apk_path, output_dir="/workspace/dragon-land-server/modified-apk",
+                 use_cache=True, cache_max_bytes=4 * 1024**3):
         self.apk_path = apk_path
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.work_dir = self.output_dir / "work"
         self.work_dir.mkdir(exist_ok=True)
+        self.cache = DecompileCache(self.work_dir / "cache", cache_max_bytes) if use_cache else None
+        self.cache_key = None
+        self.cache_tool = None
+        self.cache_status = None
+        
+    def decompiler_version(self):
+        """Identify the decompiler so cached trees from different tools don't mix"""
+        if not shutil.which("apktool"):
+            return "zip"
+        result = subprocess.run(["apktool", "--version"], capture_output=True, text=True)
+        return f"apktool {result.stdout.strip()}"
+    
+    def decompile_apk(self, editable=False):
+        """Decompile APK, reusing a cached tree when the APK is unchanged
         
-    def decompile_apk(self):
-        """Decompile APK using apktool"""
+        The default checkout hardlinks read-only files from the cache for the
+        modify pipeline; pass editable=True for a tree the user will edit.
+        """
         print("[1] Decompiling APK...")
         decompile_dir = self.work_dir / "decompiled"
         
+        if not self.cache:
+            self._decompile_to(decompile_dir)
+            return decompile_dir
+        
+        start = time.perf_counter()
+        tool = self.decompiler_version()
+        key = self.cache.key_for(self.apk_path, tool)
+        meta = self.cache.lookup(key)
+        
+        if meta:
+            self.cache.checkout(key, decompile_dir, editable)
+            elapsed = time.perf_counter() - start
+            saved = max(meta["decompile_seconds"] - elapsed, 0)
+            self.cache_status = {"status": "hit", "key": key, "seconds": elapsed, "saved_seconds": saved}
+            print(f"✓ Cache hit ({key[:12]}): reused decompiled tree, saved ~{saved:.1f}s")
+        else:
+            staging = self.cache.staging_dir(key)
+            self._decompile_to(staging)
+            decompile_seconds = time.perf_counter() - start
+            self.cache.store(key, staging, decompile_seconds, tool)
+            self.cache.checkout(key, decompile_dir, editable)
+            elapsed = time.perf_counter() - start
+            self.cache_status = {"status": "miss", "key": key, "seconds": elapsed, "saved_seconds": 0}
+            print(f"   Cache miss ({key[:12]}): decompiled tree stored")
+        
+        self.cache_key = key
+        self.cache_tool = tool
+        return decompile_dir
+    
+    def _decompile_to(self, decompile_dir):
+        """Decompile APK into decompile_dir using apktool"""
         # Check if apktool is available
         if not shutil.which("apktool"):
             print("⚠ apktool not found, extracting as ZIP...")
             # Fallback: extract as ZIP
-            import zipfile
             with zipfile.ZipFile(self.apk_path, 'r') as zip_ref:
                 zip_ref.extractall(decompile_dir)
             print("✓ APK extracted as ZIP")
@@ -37,8 +101,38 @@ class APKModifier:
             cmd = ["apktool", "d", "-f", self.apk_path, "-o", str(decompile_dir)]
             subprocess.run(cmd, check=True)
             print("✓ APK decompiled successfully")
+    
+    def rewrite_settings_text(self, content, new_appid=None, new_server=None, new_port=5055):
+        """Return PhotonServerSettings text with the new AppID/server applied"""
+        # Parse YAML
+        try:
+            data = yaml.safe_load(content)
+        except:
+            print("⚠ Could not parse as YAML, using text replacement...")
+            data = None
         
-        return decompile_dir
+        if data:
+            # Modify using YAML structure
+            if new_appid:
+                data['MonoBehaviour']['AppID'] = new_appid
+            if new_server:
+                data['MonoBehaviour']['HostType'] = 2  # SelfHosted
+                data['MonoBehaviour']['ServerAddress'] = new_server
+                data['MonoBehaviour']['ServerPort'] = new_port
+            
+            return yaml.dump(data)
+        
+        # Fallback: text replacement
+        if new_appid:
+            content = content.replace(ORIGINAL_APPID, new_appid)
+        
+        if new_server:
+            # Change HostType to SelfHosted
+            content = content.replace("HostType: 4", "HostType: 2")
+            content = content.replace("ServerAddress:", f"ServerAddress: {new_server}")
+            content = content.replace("ServerPort: 5055", f"ServerPort: {new_port}")
+        
+        return content
     
     def modify_photon_settings(self, decompile_dir, new_appid=None, new_server=None, new_port=5055):
         """Modify PhotonServerSettings.asset"""
@@ -47,13 +141,13 @@ class APKModifier:
         # Find PhotonServerSettings
         settings_path = None
         for root, dirs, files in os.walk(decompile_dir):
-            if "PhotonServerSettings.asset" in files:
-                settings_path = Path(root) / "PhotonServerSettings.asset"
+            if SETTINGS_ASSET in files:
+                settings_path = Path(root) / SETTINGS_ASSET
                 break
         
         if not settings_path:
-            print("⚠ PhotonServerSettings.asset not found!")
-            return False
+            print("⚠ PhotonServerSettings.asset not found, scanning serialized assets...")
+            return self.patch_serialized_assets(decompile_dir, new_appid, new_server, new_port)
         
         print(f"   Found: {settings_path}")
         
@@ -61,54 +155,73 @@ class APKModifier:
         with open(settings_path, 'r', encoding='utf-8', errors='ignore') as f:
             content = f.read()
         
-        # Parse YAML
-        try:
-            data = yaml.safe_load(content)
-        except:
-            print("⚠ Could not parse as YAML, using text replacement...")
-            data = None
+        content = self.rewrite_settings_text(content, new_appid, new_server, new_port)
         
-        if data:
-            # Modify using YAML structure
-            if new_appid:
-                data['MonoBehaviour']['AppID'] = new_appid
-            if new_server:
-                data['MonoBehaviour']['HostType'] = 2  # SelfHosted
-                data['MonoBehaviour']['ServerAddress'] = new_server
-                data['MonoBehaviour']['ServerPort'] = new_port
-            
-            # Write back
-            with open(settings_path, 'w') as f:
-                yaml.dump(data, f)
-        else:
-            # Fallback: text replacement
-            if new_appid:
-                old_appid = "1eb3a592-f2d1-41c1-ac3a-cd6308fca5cb"
-                content = content.replace(old_appid, new_appid)
-            
-            if new_server:
-                # Change HostType to SelfHosted
-                content = content.replace("HostType: 4", "HostType: 2")
-                content = content.replace("ServerAddress:", f"ServerAddress: {new_server}")
-                content = content.replace("ServerPort: 5055", f"ServerPort: {new_port}")
-            
-            with open(settings_path, 'w') as f:
-                f.write(content)
+        # Replace rather than overwrite: the tree may be hardlinked to the cache
+        tmp_path = settings_path.with_name(settings_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, settings_path)
+        
+        print("✓ Photon settings modified")
+        return True
+    
+    def patch_serialized_assets(self, decompile_dir, new_appid=None, new_server=None, new_port=5055):
+        """Patch Photon settings stored in binary Unity serialized files
+        
+        Candidate .assets files are memory-mapped and searched for the
+        length-prefixed original AppID; server fields are located relative to
+        it. Patched files are replaced, never written through, so a cached
+        hardlinked tree stays pristine.
+        """
+        scanner = AssetScanner({"AppID": ORIGINAL_APPID})
+        hits, stats = scanner.scan_tree(decompile_dir)
+        print(f"   Scanned {stats['files']} files ({stats['bytes'] / (1024*1024):.2f} MB) "
+              f"in {stats['seconds']:.2f}s, {len(hits)} AppID hits")
+        if not hits:
+            print("⚠ Photon settings not found in serialized assets!")
+            return False
+        
+        edits_by_file = {}
+        for hit in hits:
+            edits = plan_settings_edits(hit, new_appid, new_server, new_port)
+            if edits is None:
+                print(f"   ⚠ Skipping {hit.path.name}@{hit.offset}: not a ServerSettings layout")
+                continue
+            edits_by_file.setdefault(hit.path, []).extend(edits)
+        if not edits_by_file:
+            print("⚠ No patchable Photon settings found!")
+            return False
+        
+        for path, edits in edits_by_file.items():
+            # Break any hardlink to the cache before writing through mmap
+            if path.stat().st_nlink > 1:
+                tmp_path = path.with_name(path.name + ".tmp")
+                shutil.copy2(path, tmp_path)
+                os.replace(tmp_path, path)
+            os.chmod(path, stat.S_IMODE(path.stat().st_mode) | stat.S_IWUSR)
+            try:
+                in_place, resized = apply_edits(path, edits)
+            except ValueError as e:
+                print(f"   ⚠ {e}")
+                return False
+            print(f"   Patched {path.name}: {in_place} in place, {resized} resized")
         
         print("✓ Photon settings modified")
         return True
     
-    def rebuild_apk(self, decompile_dir):
-        """Rebuild APK"""
+    def rebuild_apk(self, decompile_dir, output_apk=None):
+        """Rebuild APK, patching the original archive when only raw files changed"""
         print("[3] Rebuilding APK...")
-        output_apk = self.output_dir / "DragonLand_Modified.apk"
+        output_apk = Path(output_apk) if output_apk else self.output_dir / "DragonLand_Modified.apk"
         
-        if shutil.which("apktool"):
+        if self.cache_key and self.rebuild_incremental(decompile_dir, output_apk):
+            pass
+        elif shutil.which("apktool"):
             cmd = ["apktool", "b", str(decompile_dir), "-o", str(output_apk)]
             subprocess.run(cmd, check=True)
         else:
             # Fallback: rezip
-            import zipfile
             with zipfile.ZipFile(output_apk, 'w', zipfile.ZIP_DEFLATED) as zipf:
                 for root, dirs, files in os.walk(decompile_dir):
                     for file in files:
@@ -119,12 +232,108 @@ class APKModifier:
         print(f"✓ APK rebuilt: {output_apk}")
         return output_apk
     
-    def sign_apk(self, apk_path):
-        """Sign APK with debug keystore"""
-        print("[4] Signing APK...")
-        signed_apk = self.output_dir / "DragonLand_Modified_Signed.apk"
+    def rebuild_incremental(self, decompile_dir, output_apk):
+        """Rebuild from the original APK, re-encoding only files that changed
         
-        # Create debug keystore if it doesn't exist
+        Compares the extracted tree with the cached per-file hashes and copies
+        every untouched entry raw. In an apktool tree only files under
+        assets/ are stored verbatim, so any other change (smali, decoded
+        resources, the manifest) needs a full apktool build. Returns False if
+        the tree no longer maps onto the archive's entry names.
+        """
+        changed, added, removed = self.cache.diff(self.cache_key, decompile_dir)
+        print(f"   Incremental: {len(changed)} changed, {len(added)} added, {len(removed)} removed")
+        
+        layout = read_central_directory(self.apk_path)
+        signatures = []
+        if self.cache_tool != "zip":
+            decoded = [rel for rel in changed + added + removed if not rel.startswith(APKTOOL_RAW_DIR)]
+            if decoded:
+                print(f"   Decoded files changed ({decoded[0]}...), running a full apktool build")
+                return False
+            # apktool b drops the original signature files; do the same
+            signatures = [entry.name for entry in layout.entries if SIGNATURE_FILE.match(entry.name)]
+        
+        path = lambda rel: Path(decompile_dir) / rel
+        try:
+            stats = patch_zip(
+                self.apk_path, output_apk,
+                {rel: path(rel) for rel in changed},
+                layout,
+                removals=removed + signatures,
+                additions={rel: path(rel) for rel in added}
+            )
+        except (KeyError, ValueError) as e:
+            print(f"   ⚠ Incremental rebuild not possible ({e}), rebuilding in full...")
+            return False
+        
+        print(f"   Copied {stats['copied']} entries raw")
+        return True
+    
+    def index_apk(self):
+        """Read the central directory and original settings text once
+        
+        Returns None if the archive has no PhotonServerSettings.asset.
+        """
+        layout = read_central_directory(self.apk_path)
+        entry = layout.find(SETTINGS_ASSET)
+        if not entry:
+            return None
+        
+        with zipfile.ZipFile(self.apk_path, 'r') as zip_ref:
+            content = zip_ref.read(entry.name).decode('utf-8', errors='ignore')
+        
+        return {"layout": layout, "entry": entry.name, "content": content}
+    
+    def apply_index(self, index, output_apk, new_appid=None, new_server=None, new_port=5055):
+        """Write output_apk from an index_apk() result with new settings applied"""
+        content = self.rewrite_settings_text(index["content"], new_appid, new_server, new_port)
+        return patch_zip(self.apk_path, output_apk, {index["entry"]: content.encode('utf-8')}, index["layout"])
+    
+    def build_from_cache(self, index, tree, output_apk, new_appid=None, new_server=None, new_port=5055):
+        """Patch a private checkout of a cached tree and rebuild it to output_apk
+        
+        Used by batch workers when the settings live in binary assets: the
+        APK is decompiled once, each variant gets its own hardlinked checkout
+        and only the patched files are re-encoded.
+        """
+        self.cache_key = index["cache_key"]
+        self.cache_tool = index["cache_tool"]
+        self.cache.checkout(self.cache_key, tree)
+        try:
+            if not self.modify_photon_settings(tree, new_appid, new_server, new_port):
+                raise ValueError("Photon settings not found or not patchable")
+            return self.rebuild_apk(tree, output_apk)
+        finally:
+            shutil.rmtree(tree, ignore_errors=True)
+    
+    def patch_apk_streaming(self, new_appid=None, new_server=None, new_port=5055, output_apk=None):
+        """Patch PhotonServerSettings inside the APK without extracting it
+        
+        Unchanged entries are copied raw from the original archive; only the
+        settings entry is inflated, modified and deflated again.
+        """
+        print("[2] Patching Photon settings in archive...")
+        output_apk = Path(output_apk) if output_apk else self.output_dir / "DragonLand_Modified.apk"
+        start = time.perf_counter()
+        
+        index = self.index_apk()
+        if not index:
+            print(f"⚠ {SETTINGS_ASSET} not found in archive!")
+            return None
+        
+        print(f"   Found: {index['entry']}")
+        stats = self.apply_index(index, output_apk, new_appid, new_server, new_port)
+        
+        elapsed = time.perf_counter() - start
+        print(f"   Copied {stats['copied']} entries raw, rewrote {stats['rewritten']}")
+        print(f"   Read {stats['bytes_read'] / (1024*1024):.2f} MB, "
+              f"wrote {stats['bytes_written'] / (1024*1024):.2f} MB in {elapsed:.2f}s")
+        print(f"✓ APK patched: {output_apk}")
+        return output_apk
+    
+    def ensure_keystore(self):
+        """Create the debug keystore if needed, returning its path or None"""
         keystore = self.work_dir / "debug.keystore"
         if not keystore.exists():
             cmd = [
@@ -143,7 +352,19 @@ class APKModifier:
                 print("   ✓ Debug keystore created")
             except:
                 print("   ⚠ Could not create keystore (keytool not available)")
-                return apk_path
+                return None
+        
+        return keystore
+    
+    def sign_apk(self, apk_path, signed_apk=None):
+        """Sign APK with debug keystore"""
+        print("[4] Signing APK...")
+        signed_apk = Path(signed_apk) if signed_apk else self.output_dir / "DragonLand_Modified_Signed.apk"
+        
+        # Create debug keystore if it doesn't exist
+        keystore = self.ensure_keystore()
+        if not keystore:
+            return apk_path
         
         # Sign APK
         try:
@@ -164,8 +385,23 @@ class APKModifier:
             print("   ⚠ Could not sign APK (jarsigner not available)")
             return apk_path
     
-    def modify(self, new_appid=None, new_server=None, new_port=5055):
-        """Complete modification workflow"""
+    def write_delta(self, final_apk):
+        """Write a binary delta from the original APK to final_apk"""
+        print("[5] Writing binary delta...")
+        final_apk = Path(final_apk)
+        delta_path = final_apk.with_suffix(".delta")
+        stats = create_delta(self.apk_path, final_apk, delta_path)
+        print(f"✓ Delta written: {delta_path} ({stats['delta_size'] / 1024:.1f} KB)")
+        print(f"   Apply with: python apk_delta.py apply <original.apk> {delta_path.name} {final_apk.name}")
+        return delta_path
+    
+    def modify(self, new_appid=None, new_server=None, new_port=5055, streaming=False, delta=False):
+        """Complete modification workflow
+        
+        With streaming=True the APK is patched in-archive instead of being
+        decompiled, edited and rebuilt. With delta=True a binary delta
+        against the original APK is written next to the output.
+        """
         print("="*60)
         print("DRAGON LAND APK MODIFIER")
         print("="*60)
@@ -178,25 +414,37 @@ class APKModifier:
         print("="*60)
         
         try:
-            # Decompile
-            decompile_dir = self.decompile_apk()
-            
-            # Modify
-            if not self.modify_photon_settings(decompile_dir, new_appid, new_server, new_port):
-                print("❌ Failed to modify settings")
-                return None
-            
-            # Rebuild
-            rebuilt_apk = self.rebuild_apk(decompile_dir)
+            if streaming:
+                # Patch in place, copying unchanged entries raw
+                rebuilt_apk = self.patch_apk_streaming(new_appid, new_server, new_port)
+                if not rebuilt_apk:
+                    print("❌ Failed to modify settings")
+                    return None
+            else:
+                # Decompile
+                decompile_dir = self.decompile_apk()
+                
+                # Modify
+                if not self.modify_photon_settings(decompile_dir, new_appid, new_server, new_port):
+                    print("❌ Failed to modify settings")
+                    return None
+                
+                # Rebuild
+                rebuilt_apk = self.rebuild_apk(decompile_dir)
             
             # Sign
             final_apk = self.sign_apk(rebuilt_apk)
             
+            # Delta
+            delta_path = self.write_delta(final_apk) if delta else None
+            
             print("\n" + "="*60)
             print("✓ MODIFICATION COMPLETE!")
             print("="*60)
             print(f"Modified APK: {final_apk}")
             print(f"Size: {final_apk.stat().st_size / (1024*1024):.2f} MB")
+            if delta_path:
+                print(f"Delta: {delta_path} ({delta_path.stat().st_size / 1024:.1f} KB)")
             print("\nNext steps:")
             print("1. Upload to Appetize.io")
             print("2. Test connection to server")
@@ -211,7 +459,194 @@ class APKModifier:
             traceback.print_exc()
             return None
 
-def main():
+def variant_errors(variants):
+    """Return a list of problems with a manifest's variants, empty if valid
+    
+    Each variant needs a safe name, at least one of "appid" or "server" and,
+    if given, a "port" between 1 and 65535. Names must be unique ignoring
+    case, since each variant is written to its own directory.
+    """
+    errors = []
+    seen = set()
+    for number, variant in enumerate(variants, 1):
+        if not isinstance(variant, dict):
+            errors.append(f"variant {number}: must be an object")
+            continue
+        name = variant.get("name")
+        if not isinstance(name, str) or not VARIANT_NAME.match(name):
+            errors.append(f"variant {number}: invalid name {name!r} (letters, digits, '.', '_' and '-' only)")
+            continue
+        if name.lower() in seen:
+            errors.append(f"{name}: duplicate variant name")
+        seen.add(name.lower())
+        if not (variant.get("appid") or variant.get("server")):
+            errors.append(f"{name}: needs an \"appid\" or a \"server\"")
+        port = variant.get("port", 5055)
+        if isinstance(port, bool) or not isinstance(port, int) or not 1 <= port <= 65535:
+            errors.append(f"{name}: port must be an integer from 1 to 65535, got {port!r}")
+    return errors
+
+def build_variant(apk_path, output_dir, index, variant, delta=False):
+    """Produce one signed variant APK; runs inside a batch worker process
+    
+    Outputs go to <output_dir>/variants/<name>/ so no two variants, and no
+    variant and the interactive build, share a file.
+    """
+    name = variant["name"]
+    modifier = APKModifier(apk_path, output_dir)
+    variant_dir = modifier.output_dir / "variants" / name
+    variant_dir.mkdir(parents=True, exist_ok=True)
+    timings = {}
+    
+    start = time.perf_counter()
+    rebuilt_apk = variant_dir / f"DragonLand_{name}.apk"
+    settings = {
+        "new_appid": variant.get("appid"),
+        "new_server": variant.get("server"),
+        "new_port": variant.get("port", 5055)
+    }
+    if "entry" in index:
+        modifier.apply_index(index, rebuilt_apk, **settings)
+    else:
+        modifier.build_from_cache(index, modifier.work_dir / "variants" / name, rebuilt_apk, **settings)
+    timings["patch"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    final_apk = modifier.sign_apk(rebuilt_apk, variant_dir / f"DragonLand_{name}_Signed.apk")
+    timings["sign"] = time.perf_counter() - start
+    
+    result = {
+        "name": name,
+        "output": str(final_apk),
+        "size_mb": final_apk.stat().st_size / (1024*1024),
+        "timings": timings
+    }
+    
+    if variant.get("delta", delta):
+        start = time.perf_counter()
+        delta_path = modifier.write_delta(final_apk)
+        timings["delta"] = time.perf_counter() - start
+        result["delta"] = str(delta_path)
+        result["delta_kb"] = delta_path.stat().st_size / 1024
+    
+    timings["total"] = sum(timings.values())
+    return result
+
+def run_batch(manifest_path, jobs=None):
+    """Build every variant listed in a JSON manifest on a process pool
+    
+    The manifest is {"apk": ..., "output_dir": ..., "variants": [...]} where
+    each variant has a unique "name", an "appid" and/or "server", and
+    optional "port" and "delta". A top-level "delta": true writes binary deltas for
+    every variant. The source APK is indexed once and shared with all workers.
+    If it has no text PhotonServerSettings.asset, it is decompiled once into
+    the cache instead and each worker patches the binary assets of its own
+    checkout.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    
+    variants = manifest.get("variants")
+    if not isinstance(variants, list) or not variants:
+        print("❌ Manifest must list at least one variant")
+        return None
+    
+    errors = variant_errors(variants)
+    if errors:
+        print("❌ Invalid manifest:")
+        for error in errors:
+            print(f"   - {error}")
+        return None
+    names = [variant["name"] for variant in variants]
+    
+    modifier = APKModifier(
+        manifest.get("apk", "/workspace/full thang/Dragon Land (1).apk"),
+        manifest.get("output_dir", "/workspace/dragon-land-server/modified-apk")
+    )
+    jobs = jobs or manifest.get("jobs") or min(len(variants), os.cpu_count() or 1)
+    jobs = max(int(jobs), 1)
+    
+    print("="*60)
+    print("DRAGON LAND APK MODIFIER - BATCH")
+    print("="*60)
+    print(f"Input APK: {modifier.apk_path}")
+    print(f"Variants: {len(variants)} ({jobs} workers)")
+    print("="*60)
+    
+    batch_start = time.perf_counter()
+    
+    print("[1] Indexing source APK...")
+    start = time.perf_counter()
+    index = modifier.index_apk()
+    if index:
+        print(f"   Found: {index['entry']}")
+    elif modifier.cache:
+        print(f"   No text {SETTINGS_ASSET}, patching binary assets from a cached tree")
+        modifier.decompile_apk()
+        index = {"cache_key": modifier.cache_key, "cache_tool": modifier.cache_tool}
+    else:
+        print(f"❌ {SETTINGS_ASSET} not found in archive!")
+        return None
+    index_time = time.perf_counter() - start
+    print(f"   Indexed in {index_time:.2f}s")
+    
+    # Create the keystore up front so workers don't race to generate it
+    modifier.ensure_keystore()
+    
+    print("[2] Building variants...")
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                build_variant, modifier.apk_path, modifier.output_dir, index, variant,
+                manifest.get("delta", False)
+            ): variant["name"]
+            for variant in variants
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"name": futures[future], "error": str(e)}
+                print(f"   ❌ {result['name']}: {e}")
+            else:
+                print(f"   ✓ {result['name']}: {result['output']} ({result['timings']['total']:.2f}s)")
+            results.append(result)
+    
+    results.sort(key=lambda r: names.index(r["name"]))
+    summary = {
+        "source_apk": str(modifier.apk_path),
+        "jobs": jobs,
+        "timings": {
+            "index": index_time,
+            "total": time.perf_counter() - batch_start
+        },
+        "variants": results
+    }
+    
+    summary_file = modifier.output_dir / "batch_summary.json"
+    with open(summary_file, 'w') as f:
+        json.dump(summary, f, indent=2)
+    
+    print("\n" + "="*60)
+    print("BATCH SUMMARY")
+    print("="*60)
+    for result in results:
+        if "error" in result:
+            print(f"❌ {result['name']}: {result['error']}")
+        else:
+            t = result["timings"]
+            print(f"✓ {result['name']}: {result['size_mb']:.2f} MB "
+                  f"(patch {t['patch']:.2f}s, sign {t['sign']:.2f}s)")
+            if "delta" in result:
+                print(f"   delta: {result['delta_kb']:.1f} KB ({t['delta']:.2f}s)")
+    print(f"\nTotal time: {summary['timings']['total']:.2f}s")
+    print(f"Summary saved to: {summary_file}")
+    print("="*60)
+    
+    return summary
+
+def main(streaming=False, delta=False):
     # Configuration
     apk_path = "/workspace/full thang/Dragon Land (1).apk"
     
@@ -238,18 +673,18 @@ def main():
     
     if choice == "1":
         appid = input("Enter new Photon AppID: ").strip()
-        modifier.modify(new_appid=appid)
+        modifier.modify(new_appid=appid, streaming=streaming, delta=delta)
     elif choice == "2":
         server = input("Enter server address: ").strip()
         port = input("Enter port (default 5055): ").strip() or "5055"
-        modifier.modify(new_server=server, new_port=int(port))
+        modifier.modify(new_server=server, new_port=int(port), streaming=streaming, delta=delta)
     elif choice == "3":
         appid = input("Enter new Photon AppID: ").strip()
         server = input("Enter server address: ").strip()
         port = input("Enter port (default 5055): ").strip() or "5055"
-        modifier.modify(new_appid=appid, new_server=server, new_port=int(port))
+        modifier.modify(new_appid=appid, new_server=server, new_port=int(port), streaming=streaming, delta=delta)
     elif choice == "4":
-        decompile_dir = modifier.decompile_apk()
+        decompile_dir = modifier.decompile_apk(editable=True)
         print(f"\n✓ APK extracted to: {decompile_dir}")
     else:
         print("Invalid choice!")
@@ -261,7 +696,19 @@ if __name__ == "__main__":
             # Auto mode: just extract
             apk_path = "/workspace/full thang/Dragon Land (1).apk"
             modifier = APKModifier(apk_path)
-            decompile_dir = modifier.decompile_apk()
+            decompile_dir = modifier.decompile_apk(editable=True)
             print(f"\n✓ APK decompiled to: {decompile_dir}")
+        elif sys.argv[1] == "--batch":
+            # Batch mode: build every variant in a JSON manifest
+            parser = argparse.ArgumentParser(prog="modify_apk.py --batch")
+            parser.add_argument("manifest", help="JSON manifest of variants")
+            parser.add_argument("--jobs", type=int, help="maximum worker processes")
+            args = parser.parse_args(sys.argv[2:])
+            if not run_batch(args.manifest, args.jobs):
+                sys.exit(1)
+        elif sys.argv[1] in ("--stream", "--delta"):
+            # --stream: patch inside the archive instead of extract/rebuild
+            # --delta: also write a binary delta against the original APK
+            main(streaming="--stream" in sys.argv, delta="--delta" in sys.argv)
     else:
         main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Streaming ZIP patcher for Dragon Land APKs
+Rewrites selected entries and copies everything else raw (no inflate/deflate)
+"""
+
+import io
+import struct
+import time
+import zlib
+from collections import namedtuple
+
+LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+CENTRAL_HEADER = struct.Struct("<4s6H3I5HII")
+END_OF_CENTRAL_DIR = struct.Struct("<4s4H2IH")
+
+LOCAL_SIG = b"PK\x03\x04"
+CENTRAL_SIG = b"PK\x01\x02"
+EOCD_SIG = b"PK\x05\x06"
+DESCRIPTOR_SIG = b"PK\x07\x08"
+
+LOCAL_CRC_OFFSET = 14
+
+FLAG_DATA_DESCRIPTOR = 0x08
+STORED = 0
+DEFLATED = 8
+
+CHUNK_SIZE = 1024 * 1024
+
+ZipEntry = namedtuple("ZipEntry", "name raw_name fields extra comment")
+
+
+class ZipLayout(namedtuple("ZipLayout", "entries comment")):
+    """Parsed central directory of an archive"""
+
+    def find(self, filename):
+        """Return the first entry whose file name (last path part) is filename"""
+        for entry in self.entries:
+            if entry.name.rsplit("/", 1)[-1] == filename:
+                return entry
+        return None
+
+
+def read_central_directory(path):
+    """Parse the central directory of a ZIP/APK without touching entry data"""
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        tail_size = min(size, END_OF_CENTRAL_DIR.size + 0xFFFF)
+        f.seek(size - tail_size)
+        tail = f.read(tail_size)
+
+        pos = tail.rfind(EOCD_SIG)
+        if pos < 0:
+            raise ValueError(f"{path}: end of central directory not found")
+        (_, _, _, _, total, cd_size, cd_offset, comment_len) = END_OF_CENTRAL_DIR.unpack_from(tail, pos)
+        if total == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+            raise ValueError(f"{path}: zip64 archives are not supported")
+        start = pos + END_OF_CENTRAL_DIR.size
+        comment = tail[start:start + comment_len]
+
+        f.seek(cd_offset)
+        directory = f.read(cd_size)
+
+    entries = []
+    offset = 0
+    for _ in range(total):
+        fields = list(CENTRAL_HEADER.unpack_from(directory, offset))
+        if fields[0] != CENTRAL_SIG:
+            raise ValueError(f"{path}: corrupt central directory entry at {cd_offset + offset}")
+        name_len, extra_len, comment_len = fields[10], fields[11], fields[12]
+        offset += CENTRAL_HEADER.size
+        name = directory[offset:offset + name_len]
+        offset += name_len
+        extra = directory[offset:offset + extra_len]
+        offset += extra_len
+        entry_comment = directory[offset:offset + comment_len]
+        offset += comment_len
+        entries.append(ZipEntry(name.decode("utf-8", errors="replace"), name, fields, extra, entry_comment))
+    return ZipLayout(entries, comment)
+
+
+def _copy_range(src, dst, length):
+    """Copy length bytes from the current position of src to dst"""
+    remaining = length
+    while remaining:
+        chunk = src.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise ValueError("unexpected end of archive while copying entry")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def _copy_entry_raw(src, dst, entry):
+    """Copy a local header, its compressed data and data descriptor verbatim"""
+    fields = entry.fields
+    src.seek(fields[16])
+    header = src.read(LOCAL_HEADER.size)
+    local = LOCAL_HEADER.unpack(header)
+    if local[0] != LOCAL_SIG:
+        raise ValueError(f"corrupt local header for {entry.name}")
+    dst.write(header)
+    _copy_range(src, dst, local[9] + local[10] + fields[8])
+
+    if fields[3] & FLAG_DATA_DESCRIPTOR:
+        descriptor = src.read(4)
+        if descriptor == DESCRIPTOR_SIG:
+            descriptor += src.read(12)
+        else:
+            descriptor += src.read(8)
+        dst.write(descriptor)
+
+
+def _open_data(data):
+    """Open new entry contents given as bytes or as a file path"""
+    if isinstance(data, (bytes, bytearray)):
+        return io.BytesIO(data)
+    return open(data, "rb")
+
+
+def _write_data(dst, data, method, header_pos):
+    """Stream data into dst, then fill in the local header's CRC and sizes
+
+    The contents are read and compressed in CHUNK_SIZE pieces, so memory use
+    does not depend on the entry size.
+    """
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15) if method == DEFLATED else None
+    crc = size = compressed = 0
+    with _open_data(data) as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            if compressor:
+                chunk = compressor.compress(chunk)
+            dst.write(chunk)
+            compressed += len(chunk)
+    if compressor:
+        tail = compressor.flush()
+        dst.write(tail)
+        compressed += len(tail)
+    if size >= 0xFFFFFFFF or compressed >= 0xFFFFFFFF:
+        raise ValueError("entry would need zip64, which is not supported")
+
+    crc &= 0xFFFFFFFF
+    end = dst.tell()
+    dst.seek(header_pos + LOCAL_CRC_OFFSET)
+    dst.write(struct.pack("<3I", crc, compressed, size))
+    dst.seek(end)
+    return crc, compressed, size
+
+
+def _write_entry(src, dst, entry, data):
+    """Write entry with new uncompressed contents, keeping its compression method"""
+    fields = list(entry.fields)
+    method = STORED if fields[4] == STORED else DEFLATED
+
+    src.seek(fields[16])
+    local = LOCAL_HEADER.unpack(src.read(LOCAL_HEADER.size))
+    name_and_extra = src.read(local[9] + local[10])
+
+    flags = fields[3] & ~FLAG_DATA_DESCRIPTOR
+    header_pos = dst.tell()
+    dst.write(LOCAL_HEADER.pack(
+        LOCAL_SIG, local[1], flags, method, local[4], local[5],
+        0, 0, 0, local[9], local[10]
+    ))
+    dst.write(name_and_extra)
+
+    fields[3] = flags
+    fields[4] = method
+    fields[7], fields[8], fields[9] = _write_data(dst, data, method, header_pos)
+    return fields
+
+
+def _dos_datetime(timestamp):
+    """Convert a POSIX timestamp to ZIP (DOS) time and date fields"""
+    t = time.localtime(max(timestamp, 315532800))
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def _new_entry(name):
+    """Build a ZipEntry template for an entry that is not in the source archive"""
+    raw_name = name.encode("utf-8")
+    flags = 0x800 if not raw_name.isascii() else 0
+    dos_time, dos_date = _dos_datetime(time.time())
+    fields = [CENTRAL_SIG, 20, 20, flags, DEFLATED, dos_time, dos_date,
+              0, 0, 0, len(raw_name), 0, 0, 0, 0, 0o100644 << 16, 0]
+    return ZipEntry(name, raw_name, fields, b"", b"")
+
+
+def _write_new_entry(dst, entry, data):
+    """Write a local header and deflated data for an added entry"""
+    fields = list(entry.fields)
+    header_pos = dst.tell()
+    dst.write(LOCAL_HEADER.pack(
+        LOCAL_SIG, fields[2], fields[3], fields[4], fields[5], fields[6],
+        0, 0, 0, fields[10], 0
+    ))
+    dst.write(entry.raw_name)
+    fields[7], fields[8], fields[9] = _write_data(dst, data, fields[4], header_pos)
+    return fields
+
+
+def patch_zip(src_path, dst_path, replacements, layout=None, removals=(), additions=None):
+    """Write dst_path as a copy of src_path with some entries replaced
+
+    replacements maps entry names to their new uncompressed contents, given
+    as bytes or as a path to a file that is streamed in chunks. Entries named
+    in removals are left out and additions (name -> bytes or path) are
+    appended.
+    Every other entry is copied raw, compressed bytes and all. Any APK signing
+    block is dropped, so the output must be re-signed.
+    """
+    if layout is None:
+        layout = read_central_directory(src_path)
+    additions = additions or {}
+    removals = set(removals)
+
+    names = {entry.name for entry in layout.entries}
+    missing = (set(replacements) | removals) - names
+    if missing:
+        raise KeyError(f"entries not in archive: {', '.join(sorted(missing))}")
+    duplicates = set(additions) & names
+    if duplicates:
+        raise KeyError(f"entries already in archive: {', '.join(sorted(duplicates))}")
+
+    stats = {"entries": 0, "copied": 0, "rewritten": 0, "added": len(additions),
+             "removed": len(removals), "bytes_read": 0, "bytes_written": 0}
+    central = []
+
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        for entry in layout.entries:
+            if entry.name in removals:
+                continue
+            offset = dst.tell()
+            if entry.name in replacements:
+                fields = _write_entry(src, dst, entry, replacements[entry.name])
+                stats["rewritten"] += 1
+            else:
+                _copy_entry_raw(src, dst, entry)
+                stats["bytes_read"] += src.tell() - entry.fields[16]
+                fields = list(entry.fields)
+                stats["copied"] += 1
+            fields[16] = offset
+            central.append(CENTRAL_HEADER.pack(*fields) + entry.raw_name + entry.extra + entry.comment)
+
+        for name in sorted(additions):
+            entry = _new_entry(name)
+            offset = dst.tell()
+            fields = _write_new_entry(dst, entry, additions[name])
+            fields[16] = offset
+            central.append(CENTRAL_HEADER.pack(*fields) + entry.raw_name)
+
+        cd_offset = dst.tell()
+        for chunk in central:
+            dst.write(chunk)
+        cd_size = dst.tell() - cd_offset
+
+        count = len(central)
+        if count >= 0xFFFF or cd_offset >= 0xFFFFFFFF:
+            raise ValueError("output would need zip64, which is not supported")
+        stats["entries"] = count
+        dst.write(END_OF_CENTRAL_DIR.pack(
+            EOCD_SIG, 0, 0, count, count, cd_size, cd_offset, len(layout.comment)
+        ))
+        dst.write(layout.comment)
+        stats["bytes_written"] = dst.tell()
+
+    return stats
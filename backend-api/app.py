@@ -3,10 +3,17 @@ Dragon Land Backend API
 Handles player authentication, profiles, and game state
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, Dict, List
+from functools import partial
+from pathlib import Path
+import asyncio
+import hashlib
+import anyio
+import os
 import uvicorn
 import json
 from datetime import datetime
@@ -26,6 +33,21 @@ app.add_middleware(
 players = {}
 sessions = {}
 
+# Build artifact distribution
+BUILDS_DIR = Path(os.getenv("DRAGON_LAND_BUILDS_DIR", "/workspace/dragon-land-server/modified-apk"))
+ARTIFACT_TYPES = {
+    ".apk": "application/vnd.android.package-archive",
+    ".delta": "application/octet-stream",
+    ".unity3d": "application/octet-stream",
+    ".bundle": "application/octet-stream",
+}
+MAX_DOWNLOADS_PER_CLIENT = int(os.getenv("DRAGON_LAND_MAX_DOWNLOADS_PER_CLIENT", "2"))
+MAX_DOWNLOADS_TOTAL = int(os.getenv("DRAGON_LAND_MAX_DOWNLOADS_TOTAL", "16"))
+
+artifact_etags = {}  # path -> (size, mtime_ns, etag)
+etag_locks = {}
+active_downloads = {}  # client host -> open downloads
+
 class Player(BaseModel):
     user_id: str
     username: str
@@ -148,6 +170,196 @@ async def server_stats():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+class ArtifactResponse(Response):
+    """Sends a byte range of a build artifact
+    
+    The file is read in 1 MB chunks on a worker thread, so large downloads
+    never block the event loop serving the game routes. The pinned uvicorn
+    offers neither ASGI zero-copy extension, so there is no sendfile path.
+    """
+    chunk_size = 1024 * 1024
+    
+    def __init__(self, path, start, length, status_code, headers, on_complete):
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.start = start
+        self.length = length
+        self.on_complete = on_complete
+    
+    async def listen_for_disconnect(self, receive):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+    
+    async def send_file(self, scope, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            async with await anyio.open_file(self.path, "rb") as f:
+                await f.seek(self.start)
+                remaining = self.length
+                while remaining:
+                    chunk = await f.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining:
+                    # File shrank while streaming; end the response
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            async with anyio.create_task_group() as task_group:
+                async def wrap(func):
+                    await func()
+                    task_group.cancel_scope.cancel()
+                
+                task_group.start_soon(wrap, partial(self.send_file, scope, send))
+                await wrap(partial(self.listen_for_disconnect, receive))
+        finally:
+            self.on_complete()
+
+def hash_artifact(path):
+    """SHA-256 of an artifact, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def artifact_etag(path, stat):
+    """Strong ETag for an artifact, computed once per size/mtime"""
+    key = str(path)
+    cached = artifact_etags.get(key)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    
+    lock = etag_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        cached = artifact_etags.get(key)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        etag = f'"{await run_in_threadpool(hash_artifact, path)}"'
+        artifact_etags[key] = (stat.st_size, stat.st_mtime_ns, etag)
+        return etag
+
+def resolve_artifact(name):
+    """Map a download name to a file in BUILDS_DIR, or raise 404"""
+    path = BUILDS_DIR / name
+    if (name != Path(name).name or name.startswith(".")
+            or path.suffix not in ARTIFACT_TYPES or not path.is_file()):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return path
+
+def parse_range(header, size):
+    """Parse a single "bytes=" range into (start, length)
+    
+    Returns None when the whole file should be sent (no header, multiple
+    ranges or a malformed header) and raises ValueError if unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    if not (first or last) or any(part and not part.isdigit() for part in (first, last)):
+        return None
+    
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError("range not satisfiable")
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    return start, end - start + 1
+
+def etag_matches(header, etag):
+    """True if an If-None-Match / If-Range value names this ETag"""
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+@app.get("/builds")
+async def list_builds():
+    """List downloadable build artifacts"""
+    if not BUILDS_DIR.is_dir():
+        return {"builds": []}
+    builds = []
+    for path in sorted(BUILDS_DIR.iterdir()):
+        if path.suffix in ARTIFACT_TYPES and path.is_file() and not path.name.startswith("."):
+            stat = path.stat()
+            builds.append({
+                "name": path.name,
+                "size": stat.st_size,
+                "modified": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+                "url": f"/builds/{path.name}"
+            })
+    return {"builds": builds}
+
+@app.api_route("/builds/{name}", methods=["GET", "HEAD"])
+async def download_build(name: str, request: Request):
+    """Download a build artifact with Range, ETag and per-client limits"""
+    path = resolve_artifact(name)
+    stat = path.stat()
+    size = stat.st_size
+    etag = await artifact_etag(path, stat)
+    
+    headers = {
+        "etag": etag,
+        "accept-ranges": "bytes",
+        "content-type": ARTIFACT_TYPES[path.suffix],
+        "content-disposition": f'attachment; filename="{path.name}"',
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"etag": etag})
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
+    
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={"content-range": f"bytes */{size}", "etag": etag})
+    
+    if byte_range:
+        start, length = byte_range
+        status_code = 206
+        headers["content-range"] = f"bytes {start}-{start + length - 1}/{size}"
+    else:
+        start, length = 0, size
+        status_code = 200
+    headers["content-length"] = str(length)
+    
+    client = request.client.host if request.client else "unknown"
+    if request.method == "HEAD":
+        return ArtifactResponse(path, start, length, status_code, headers, lambda: None)
+    
+    if (active_downloads.get(client, 0) >= MAX_DOWNLOADS_PER_CLIENT
+            or sum(active_downloads.values()) >= MAX_DOWNLOADS_TOTAL):
+        raise HTTPException(status_code=429, detail="Too many concurrent downloads",
+                            headers={"Retry-After": "5"})
+    
+    active_downloads[client] = active_downloads.get(client, 0) + 1
+    
+    def release():
+        active_downloads[client] -= 1
+        if not active_downloads[client]:
+            del active_downloads[client]
+    
+    return ArtifactResponse(path, start, length, status_code, headers, release)
+
 if __name__ == "__main__":
     print("=" * 60)
     print("Dragon Land Backend Server")
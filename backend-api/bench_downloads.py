@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Dragon Land download benchmark
+Measures artifact download throughput alongside /game/save latency
+
+Usage:
+    python bench_downloads.py <artifact name> [--url http://localhost:8000] [--clients 2] [--duration 20]
+
+Downloads from one host share a per-client limit; raise
+DRAGON_LAND_MAX_DOWNLOADS_PER_CLIENT on the server to benchmark more than
+two concurrent downloads from a single machine.
+"""
+
+import sys
+import time
+import argparse
+import threading
+import statistics
+import requests
+
+
+def measure_saves(url, player_id, duration):
+    """POST /game/save in a loop, returning per-request latencies in ms"""
+    latencies = []
+    state = {
+        "player_id": player_id,
+        "episode": 1,
+        "level": 1,
+        "score": 100,
+        "coins_collected": 1,
+        "dragons_used": ["fire"]
+    }
+    session = requests.Session()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        response = session.post(f"{url}/game/save", json=state, timeout=10)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        time.sleep(0.02)
+    return latencies
+
+
+def download_loop(url, artifact, stop, totals, lock):
+    """Download the artifact repeatedly until stop is set"""
+    session = requests.Session()
+    while not stop.is_set():
+        response = session.get(f"{url}/builds/{artifact}", stream=True, timeout=30)
+        if response.status_code == 429:
+            with lock:
+                totals["rejected"] += 1
+            time.sleep(0.5)
+            continue
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            with lock:
+                totals["bytes"] += len(chunk)
+            if stop.is_set():
+                break
+        response.close()
+        with lock:
+            totals["downloads"] += 1
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)]
+    print(f"  {label:<16} n={len(latencies):<5} p50={statistics.median(latencies):6.2f}ms "
+          f"p95={pick(0.95):6.2f}ms p99={pick(0.99):6.2f}ms max={latencies[-1]:6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("artifact")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    login = requests.post(f"{args.url}/auth/login", json={"device_id": "bench-device"}, timeout=10)
+    login.raise_for_status()
+    player_id = login.json()["player"]["user_id"]
+
+    head = requests.head(f"{args.url}/builds/{args.artifact}", timeout=300)
+    if head.status_code != 200:
+        print(f"❌ Artifact not available: {head.status_code}")
+        sys.exit(1)
+    size_mb = int(head.headers["content-length"]) / (1024*1024)
+
+    print("=" * 60)
+    print("DRAGON LAND DOWNLOAD BENCHMARK")
+    print("=" * 60)
+    print(f"Artifact: {args.artifact} ({size_mb:.2f} MB), ETag {head.headers.get('etag')}")
+    print(f"Download clients: {args.clients}, duration: {args.duration:.0f}s per phase")
+
+    print("\n[1] /game/save latency, idle server...")
+    idle = measure_saves(args.url, player_id, args.duration)
+
+    print(f"[2] /game/save latency with {args.clients} concurrent downloads...")
+    stop = threading.Event()
+    lock = threading.Lock()
+    totals = {"bytes": 0, "downloads": 0, "rejected": 0}
+    threads = [
+        threading.Thread(target=download_loop, args=(args.url, args.artifact, stop, totals, lock), daemon=True)
+        for _ in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    loaded = measure_saves(args.url, player_id, args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+    elapsed = time.perf_counter() - start
+
+    print("\nResults")
+    print("-" * 60)
+    summarize("idle", idle)
+    summarize("with downloads", loaded)
+    print(f"  throughput       {totals['bytes'] / (1024*1024) / elapsed:.1f} MB/s "
+          f"({totals['downloads']} complete downloads, {totals['rejected']} rejected with 429)")
+
+
+if __name__ == "__main__":
+    main()
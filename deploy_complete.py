@@ -10,6 +10,7 @@ import time
 import requests
 import json
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")  # Set via environment variable
@@ -50,7 +51,7 @@ class DeploymentAutomation:
         
         return True
     
-    def step2_start_backend_server(self):
+    def step2_start_backend_server(self, startup_timeout=30):
         """Start the FastAPI backend server"""
         print("\n" + "="*70)
         print("STEP 2: STARTING BACKEND SERVER")
@@ -89,21 +90,58 @@ uvicorn.run(app, host="0.0.0.0", port=8000)
         
         print(f"  Process ID: {proc.pid}")
         print("  Waiting for server to start...")
-        time.sleep(3)
         
-        # Test connection
-        try:
-            response = requests.get("http://localhost:8000/health", timeout=5)
-            if response.status_code == 200:
-                print("✓ Backend server is running!")
-                print(f"  Response: {response.json()}")
-                return proc
-            else:
-                print("❌ Server started but not responding correctly")
-                return None
-        except Exception as e:
-            print(f"❌ Could not connect to server: {e}")
+        health = self.wait_for_server(proc, timeout=startup_timeout)
+        if health is None:
+            self.stop_server(proc)
             return None
+        
+        print("✓ Backend server is running!")
+        print(f"  Response: {health}")
+        return proc
+    
+    def wait_for_server(self, proc, url="http://localhost:8000/health", timeout=30,
+                        initial_delay=0.1, max_delay=2.0):
+        """Poll the health endpoint with exponential backoff until it answers
+        
+        Error responses (e.g. 503 while the app is still starting) are
+        retried like connection errors. Returns the health JSON, or None if
+        the process exits or the timeout expires.
+        """
+        deadline = time.monotonic() + timeout
+        delay = initial_delay
+        last_error = None
+        
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                print(f"❌ Server process exited with code {proc.returncode}")
+                return None
+            try:
+                response = requests.get(url, timeout=min(5, max(deadline - time.monotonic(), 0.1)))
+                if response.status_code == 200:
+                    return response.json()
+                last_error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                last_error = e
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 2, max_delay)
+        
+        print(f"❌ Could not connect to server within {timeout}s: {last_error}")
+        return None
+    
+    def stop_server(self, proc):
+        """Terminate a server process, killing it if it does not exit"""
+        if proc.poll() is not None:
+            return
+        import subprocess
+        
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        print(f"  Server process {proc.pid} stopped")
     
     def step3_photon_configuration(self):
         """Guide user through Photon setup"""
@@ -140,7 +178,7 @@ uvicorn.run(app, host="0.0.0.0", port=8000)
             print("⚠ Skipping Photon configuration")
             return None
     
-    def step4_modify_apk(self, photon_config):
+    def step4_modify_apk(self, photon_config, streaming=False, delta=False):
         """Modify APK with new server settings"""
         print("\n" + "="*70)
         print("STEP 4: APK MODIFICATION")
@@ -157,11 +195,17 @@ uvicorn.run(app, host="0.0.0.0", port=8000)
         modifier = APKModifier(str(self.apk_path))
         
         if photon_config["type"] == "cloud":
-            modified_apk = modifier.modify(new_appid=photon_config["appid"])
+            modified_apk = modifier.modify(
+                new_appid=photon_config["appid"],
+                streaming=streaming,
+                delta=delta
+            )
         else:
             modified_apk = modifier.modify(
                 new_server=photon_config["server"],
-                new_port=photon_config["port"]
+                new_port=photon_config["port"],
+                streaming=streaming,
+                delta=delta
             )
         
         return modified_apk
@@ -258,7 +302,8 @@ uvicorn.run(app, host="0.0.0.0", port=8000)
         
         return results
     
-    def generate_report(self, server_proc, photon_config, modified_apk, appetize_result, test_results):
+    def generate_report(self, server_proc, photon_config, modified_apk, appetize_result, test_results,
+                        timings=None, failures=None):
         """Generate final deployment report"""
         print("\n" + "="*70)
         print("DEPLOYMENT REPORT")
@@ -280,6 +325,10 @@ uvicorn.run(app, host="0.0.0.0", port=8000)
             "appetize": appetize_result or {"status": "not uploaded"},
             "tests": test_results or {}
         }
+        if timings:
+            report["timings"] = timings
+        if failures:
+            report["failures"] = failures
         
         report_file = self.base_path / "deployment_report.json"
         with open(report_file, 'w') as f:
@@ -303,6 +352,10 @@ uvicorn.run(app, host="0.0.0.0", port=8000)
         if appetize_result:
             print(f"✓ Appetize.io: {appetize_result['url']}")
         
+        if timings:
+            print(f"✓ Pipeline: {timings['total_seconds']:.1f}s "
+                  f"(critical path: {' → '.join(timings['critical_path'])})")
+        
         print("\nNext Steps:")
         print("  1. Test the app on Appetize.io")
         print("  2. Monitor server logs")
@@ -369,6 +422,174 @@ uvicorn.run(app, host="0.0.0.0", port=8000)
         if server_proc:
             print(f"  kill {server_proc.pid}")
 
+    def _run_stage(self, stages, name, deps, func, *args, **kwargs):
+        """Run one pipeline stage and record its wall-clock timing"""
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            stages[name] = {"start": start, "end": end, "seconds": end - start, "deps": deps}
+        return result
+    
+    def _guarded(self, errors, name, func, *args, **kwargs):
+        """Call a stage, recording any exception in errors instead of raising"""
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            print(f"❌ {name} stage failed: {e}")
+            errors.append(f"{name} stage raised {type(e).__name__}: {e}")
+            return None
+    
+    def photon_config_errors(self, photon_config):
+        """Return problems with a headless photon config, empty if valid"""
+        if photon_config is None:
+            return []
+        if not isinstance(photon_config, dict):
+            return ["photon must be an object"]
+        kind = photon_config.get("type")
+        if kind == "cloud":
+            if not isinstance(photon_config.get("appid"), str) or not photon_config["appid"]:
+                return ["photon.appid is required for type \"cloud\""]
+            return []
+        if kind == "selfhosted":
+            errors = []
+            if not isinstance(photon_config.get("server"), str) or not photon_config["server"]:
+                errors.append("photon.server is required for type \"selfhosted\"")
+            port = photon_config.get("port")
+            if isinstance(port, bool) or not isinstance(port, int) or not 1 <= port <= 65535:
+                errors.append(f"photon.port must be an integer from 1 to 65535, got {port!r}")
+            return errors
+        return [f"photon.type must be \"cloud\" or \"selfhosted\", got {kind!r}"]
+    
+    def _stage_timings(self, stages, pipeline_start):
+        """Convert recorded stages into report timings with the critical path"""
+        last = max(stages, key=lambda name: stages[name]["end"])
+        path = [last]
+        while stages[path[0]]["deps"]:
+            path.insert(0, max(stages[path[0]]["deps"], key=lambda name: stages[name]["end"]))
+        
+        return {
+            "stages": {
+                name: {
+                    "start": round(stage["start"] - pipeline_start, 3),
+                    "end": round(stage["end"] - pipeline_start, 3),
+                    "seconds": round(stage["seconds"], 3),
+                    "deps": stage["deps"]
+                }
+                for name, stage in stages.items()
+            },
+            "critical_path": path,
+            "critical_path_seconds": round(stages[last]["end"] - stages[path[0]]["start"], 3),
+            "total_seconds": round(time.perf_counter() - pipeline_start, 3)
+        }
+    
+    def run_headless(self, config_path):
+        """Execute the workflow non-interactively from a JSON config
+        
+        Server startup runs alongside APK modification; the Appetize upload
+        waits only for the APK. Per-stage and critical-path timings are
+        written to deployment_report.json. Returns None if the config is
+        invalid, the server did not start or the APK could not be modified;
+        the original APK is never uploaded in its place. A stage that raises
+        is recorded as a failure and the server is stopped.
+        """
+        with open(config_path) as f:
+            config = json.load(f)
+        
+        photon_config = config.get("photon")
+        apk_options = config.get("apk", {})
+        startup_timeout = config.get("server", {}).get("startup_timeout", 30)
+        
+        config_errors = self.photon_config_errors(photon_config)
+        if config_errors:
+            print(f"❌ Invalid config {config_path}:")
+            for error in config_errors:
+                print(f"   - {error}")
+            return None
+        
+        print("="*70)
+        print("DRAGON LAND SERVER - HEADLESS DEPLOYMENT")
+        print("="*70)
+        
+        stages = {}
+        errors = []
+        pipeline_start = time.perf_counter()
+        
+        # Step 1: Verify
+        if not self._run_stage(stages, "verify", [], self.step1_verify_environment):
+            print("\n❌ Environment verification failed. Exiting.")
+            return None
+        
+        # Steps 2 and 4 are independent: start the server while patching the APK
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            server_future = pool.submit(
+                self._run_stage, stages, "server", ["verify"],
+                self._guarded, errors, "server",
+                self.step2_start_backend_server, startup_timeout
+            )
+            apk_future = pool.submit(
+                self._run_stage, stages, "apk", ["verify"],
+                self._guarded, errors, "apk",
+                self.step4_modify_apk, photon_config,
+                streaming=apk_options.get("streaming", False),
+                delta=apk_options.get("delta", False)
+            )
+            
+            # Step 5 only needs the APK
+            modified_apk = apk_future.result()
+            if modified_apk:
+                appetize_result = self._run_stage(
+                    stages, "appetize", ["apk"],
+                    self._guarded, errors, "appetize",
+                    self.step5_appetize_upload, modified_apk
+                )
+            else:
+                appetize_result = None
+            server_proc = server_future.result()
+        
+        failures = list(errors)
+        if not server_proc:
+            failures.append("backend server did not start")
+        if photon_config and not modified_apk:
+            failures.append("APK modification failed")
+        if failures and server_proc:
+            self.stop_server(server_proc)
+            server_proc = None
+        
+        timings = self._stage_timings(stages, pipeline_start)
+        report_file = self.generate_report(
+            server_proc,
+            photon_config,
+            modified_apk,
+            appetize_result,
+            {"status": "skipped (headless)"},
+            timings,
+            failures
+        )
+        
+        print("\n" + "="*70)
+        if failures:
+            print("❌ HEADLESS DEPLOYMENT FAILED: " + "; ".join(failures))
+        else:
+            print("✓ HEADLESS DEPLOYMENT COMPLETE!")
+        print("="*70)
+        for name, stage in timings["stages"].items():
+            print(f"  {name:<10} {stage['seconds']:>8.2f}s")
+        print(f"  Critical path: {' → '.join(timings['critical_path'])} "
+              f"({timings['critical_path_seconds']:.2f}s)")
+        print(f"\nFull report: {report_file}")
+        if failures:
+            return None
+        print(f"Server is running. To stop:\n  kill {server_proc.pid}")
+        
+        return report_file
+
 if __name__ == "__main__":
     automation = DeploymentAutomation()
-    automation.run()
+    if len(sys.argv) > 2 and sys.argv[1] == "--config":
+        # Headless mode: python deploy_complete.py --config deploy_config.json
+        if not automation.run_headless(sys.argv[2]):
+            sys.exit(1)
+    else:
+        automation.run()